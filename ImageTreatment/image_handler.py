@@ -1,72 +1,77 @@
-import png
-from Classes.Color import RGBAColor
-def extractColors(pixel_map):
-    pixels = []
-    for row in pixel_map:
-        for pixel in row:
-            if not(pixel in pixels):
-                pixels.append(pixel)
-    pixels.sort()
-    return pixels
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+from PIL import Image
+from ImageTreatment.pixel_grouping import groupPackedPixels
 
-def createPixelList(rgba_values):
-    pixels = []
-    rgba_values_list = rgba_values.tolist()
-    for i in range(0, len(rgba_values), 4):
-        pixel = RGBAColor(rgba_values_list[i], rgba_values_list[i+1], rgba_values_list[i+2], rgba_values_list[i+3])
-        pixels.append(pixel)
-    return pixels
+# Pillow modes with more than 8 bits per sample (16-bit greyscale PNGs), which convert("RGBA") clips
+_WIDE_GREY_MODES = ("I", "I;16", "I;16L", "I;16B", "I;16N")
 
 
-def convertListToMap(pixel_list, width, height):
-    pixel_map = []
-    for i in range(height):
-        row_i = pixel_list[i*width: i*width + width]
-        pixel_map.append(row_i)
-    return pixel_map
+def readImage(image):
+    # Pillow opens the first frame only and converts any PNG color type to (height, width, 4) uint8.
+    # image is a path or a binary file object; Pillow closes the files it opens, file objects
+    # handed in are closed here
+    try:
+        with Image.open(image) as picture:
+            if picture.mode in _WIDE_GREY_MODES:
+                grey = np.asarray(picture).astype(np.int64) >> 8
+                picture = Image.fromarray(grey.clip(0, 255).astype(np.uint8))
+            return np.array(picture.convert("RGBA"))
+    finally:
+        if not isinstance(image, (str, os.PathLike)):
+            image.close()
 
 
-def buildPixelMap(rgba_values, width, height):
-    pixel_list = createPixelList(rgba_values)
-    return convertListToMap(pixel_list, width, height)
+def packPixels(pixels):
+    # One RGBA pixel (4 x uint8) becomes a single uint32 key, shape drops the channel axis
+    rgba = np.ascontiguousarray(pixels, dtype=np.uint8)
+    return rgba.view(np.uint32).reshape(rgba.shape[:-1])
 
 
-def getAllOccurrences(color, pixel_map):
-    occurrences = []
-    height = len(pixel_map)
-    width = len(pixel_map[height - 1])
-    for i in range(height):
-        for j in range(width):
-            pixel = pixel_map[i][j]
-            if pixel == color:
-                occurrences.append((i, j))
-    return occurrences
+def determineColorLayers(pixel_map):
+    # Every pixel belongs to exactly one color: a single grouping pass builds them all at once
+    width = pixel_map.shape[1]
+    packed = packPixels(pixel_map).ravel()
+    if packed.size == 0:
+        return np.empty((0, 4), dtype=np.uint8), []
 
-
-def determineColorLayers(pixel_map, colors):
-    layers = []
-    for i in range(len(colors)):
-        color = colors[i]
-        layer = getAllOccurrences(color, pixel_map)
-        layers.append(layer)
-    return layers
+    keys, order, boundaries = groupPackedPixels(packed)
+    colors = keys.view(np.uint8).reshape(-1, 4)
+    rows, columns = np.divmod(order.astype(np.int32), np.int32(width))
+    layers = list(zip(np.split(rows, boundaries), np.split(columns, boundaries)))
+    return colors, layers
 
 
 class ImageHandler:
     def __init__(self):
         self.size = ()
-        self.pixel_map = []  # pixel list, list
-        self.colors = []  # RGBAColor
-        self.layers = []  # RGBAColor indexes => Coordinates list [(x, y), ...]
+        self.pixel_map = np.empty((0, 0, 4), dtype=np.uint8)  # (height, width, RGBA) uint8
+        self.colors = np.empty((0, 4), dtype=np.uint8)  # unique RGBA rows
+        self.layers = []  # colors indexes => (rows, columns) int32 arrays
 
     def handle(self, image):
-        reader = png.Reader(file=image)
-        width, height, rgba_values, metadata = reader.read_flat()
-        image.close()
+        return self.handle_pixels(readImage(image))
 
+    def handle_pixels(self, pixel_map):
+        height, width = pixel_map.shape[:2]
         self.size = (width, height)
-        self.pixel_map = buildPixelMap(rgba_values, int(width), int(height))
-        self.colors = extractColors(self.pixel_map)
-        self.layers = determineColorLayers(self.pixel_map, self.colors)
+        self.pixel_map = pixel_map
+        self.colors, self.layers = determineColorLayers(self.pixel_map)
         return self
+
+    @classmethod
+    def handle_batch(cls, images, max_workers=4):
+        # images holds paths or file objects, as handle takes. Yields each handler, in input order,
+        # as soon as it is grouped; decoding runs ahead in worker threads (Pillow releases the GIL),
+        # at most max_workers images past the one being yielded
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            decoding = deque()
+            for image in images:
+                decoding.append(executor.submit(readImage, image))
+                if len(decoding) > max_workers:
+                    yield cls().handle_pixels(decoding.popleft().result())
+            while decoding:
+                yield cls().handle_pixels(decoding.popleft().result())
@@ -0,0 +1,141 @@
+import numpy as np
+
+try:
+    from numba import get_num_threads, njit, prange
+except ImportError:  # Numba is optional, the NumPy sort below is used instead
+    njit = None
+
+
+# Every grouping function takes a flat uint32 array of packed pixels and returns
+# (sorted unique keys, pixel indexes ordered by key, start index of every key but the first).
+# An empty input gives three empty arrays.
+
+# Below this many pixels the argsort finishes faster than Numba can load (or, with a cold
+# cache, compile) the hash kernel, so small images never touch the JIT
+HASH_MIN_PIXELS = 1 << 22
+# The hash kernel only wins when colors repeat. Above this estimated ratio of unique colors to
+# pixels the sort is used: on a single thread at 4K the two break even around 0.23
+HASH_MAX_UNIQUE_RATIO = 0.2
+
+
+def sortPackedPixels(packed):
+    order = np.argsort(packed, kind='stable')
+    sorted_keys = packed[order]
+    boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+    if packed.size == 0:
+        return sorted_keys, order, boundaries
+    return sorted_keys[np.r_[0, boundaries]], order, boundaries
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _insertKey(table, bits, keys, key, entry_count):
+        # Returns the entry of key, appending it to keys when new; table holds entries, -1 when empty
+        mask = np.uint64(table.size - 1)
+        slot = (np.uint64(key) * np.uint64(11400714819323198485)) >> np.uint64(64 - bits)
+        while table[slot] != -1:
+            if keys[table[slot]] == key:
+                return table[slot]
+            slot = (slot + np.uint64(1)) & mask
+        table[slot] = entry_count
+        keys[entry_count] = key
+        return entry_count
+
+    @njit(cache=True)
+    def _growTable(table, bits, keys, entry_count):
+        grown = np.full(table.size * 2, -1, dtype=np.int32)
+        for entry in range(entry_count):
+            _insertKey(grown, bits + 1, keys, keys[entry], entry)
+        return grown
+
+    @njit(parallel=True, cache=True)
+    def _hashPackedPixels(packed, chunk_count):
+        n = packed.size
+        chunk_size = (n + chunk_count - 1) // chunk_count
+
+        # Each chunk appends its unique keys to its own region of entry_keys. The open-addressed
+        # table indexing them starts small and doubles at half load, so it follows the chunk's
+        # unique count rather than its pixel count
+        entry_keys = np.empty(n, dtype=np.uint32)
+        entry_counts = np.zeros(n, dtype=np.int64)
+        chunk_entries = np.empty(chunk_count, dtype=np.int64)
+        labels = np.empty(n, dtype=np.int32)
+        for c in prange(chunk_count):
+            start = c * chunk_size
+            stop = min(start + chunk_size, n)
+            chunk_keys = entry_keys[start:stop]
+            chunk_counts = entry_counts[start:stop]
+            bits = 10
+            table = np.full(1 << bits, -1, dtype=np.int32)
+            entry_count = 0
+            for i in range(start, stop):
+                entry = _insertKey(table, bits, chunk_keys, packed[i], entry_count)
+                if entry == entry_count:
+                    entry_count += 1
+                    if 2 * entry_count > table.size:
+                        table = _growTable(table, bits, chunk_keys, entry_count)
+                        bits += 1
+                chunk_counts[entry] += 1
+                labels[i] = entry
+            chunk_entries[c] = entry_count
+
+        # Compact the chunk regions and sort their entries: O(unique) work, not O(pixels)
+        chunk_offsets = np.empty(chunk_count, dtype=np.int64)
+        entry_total = 0
+        for c in range(chunk_count):
+            chunk_offsets[c] = entry_total
+            for entry in range(chunk_entries[c]):
+                entry_keys[entry_total] = entry_keys[c * chunk_size + entry]
+                entry_counts[entry_total] = entry_counts[c * chunk_size + entry]
+                entry_total += 1
+        entry_order = np.argsort(entry_keys[:entry_total], kind='mergesort')
+
+        # The stable entry sort keeps chunks in order inside each key, so the result matches a stable sort
+        positions = np.empty(entry_total, dtype=np.int64)
+        unique_keys = np.empty(entry_total, dtype=np.uint32)
+        starts = np.empty(entry_total, dtype=np.int64)
+        key_count = 0
+        position = 0
+        for entry in entry_order:
+            if key_count == 0 or entry_keys[entry] != unique_keys[key_count - 1]:
+                unique_keys[key_count] = entry_keys[entry]
+                starts[key_count] = position
+                key_count += 1
+            positions[entry] = position
+            position += entry_counts[entry]
+
+        order = np.empty(n, dtype=np.int64)
+        for c in prange(chunk_count):
+            for i in range(c * chunk_size, min((c + 1) * chunk_size, n)):
+                entry = chunk_offsets[c] + labels[i]
+                order[positions[entry]] = i
+                positions[entry] += 1
+        return unique_keys[:key_count], order, starts[1:key_count]
+
+    def hashPackedPixels(packed):
+        return _hashPackedPixels(packed, max(1, min(get_num_threads(), packed.size)))
+
+
+def estimateUniqueCount(packed):
+    # Linear counting: hash every key into a bitmap of about as many buckets as pixels and
+    # derive the distinct count from the share of buckets left empty (a few % of error)
+    bits = min(32, max(10, int(packed.size).bit_length()))
+    bucket_count = 1 << bits
+    buckets = np.zeros(bucket_count, dtype=np.bool_)
+    # murmur3's finaliser mixes the keys well enough for the buckets to behave as random
+    hashed = packed ^ (packed >> np.uint32(16))
+    hashed *= np.uint32(0x85EBCA6B)
+    hashed ^= hashed >> np.uint32(13)
+    hashed *= np.uint32(0xC2B2AE35)
+    hashed ^= hashed >> np.uint32(16)
+    buckets[hashed >> np.uint32(32 - bits)] = True
+    empty_count = max(1, bucket_count - np.count_nonzero(buckets))
+    return bucket_count * np.log(bucket_count / empty_count)
+
+
+def groupPackedPixels(packed):
+    if njit is None or packed.size < HASH_MIN_PIXELS:
+        return sortPackedPixels(packed)
+    if estimateUniqueCount(packed) > HASH_MAX_UNIQUE_RATIO * packed.size:
+        return sortPackedPixels(packed)
+    return hashPackedPixels(packed)
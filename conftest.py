@@ -0,0 +1 @@
+# Makes the repository root importable (ImageTreatment, Classes) when running a bare `pytest`
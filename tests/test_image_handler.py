@@ -0,0 +1,101 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from ImageTreatment.image_handler import ImageHandler, determineColorLayers, readImage
+
+
+def pngFile(pixels):
+    image = io.BytesIO()
+    Image.fromarray(pixels).save(image, format="PNG")
+    image.seek(0)
+    return image
+
+
+def test_read_image_scales_16_bit_greyscale():
+    pixel_map = readImage(pngFile(np.array([[0, 20560, 41120, 65535]], dtype=np.uint16)))
+    assert pixel_map.dtype == np.uint8
+    assert pixel_map.reshape(-1, 4).tolist() == [[0, 0, 0, 255], [80, 80, 80, 255], [160, 160, 160, 255], [255, 255, 255, 255]]
+
+
+def test_read_image_takes_first_frame():
+    frames = [Image.new("RGBA", (5, 3), (50 * i, 0, 0, 255)) for i in range(3)]
+    image = io.BytesIO()
+    frames[0].save(image, format="PNG", save_all=True, append_images=frames[1:])
+    image.seek(0)
+    handler = ImageHandler().handle(image)
+    assert handler.pixel_map.shape == (3, 5, 4)
+    assert handler.size == (5, 3)
+    assert handler.colors.tolist() == [[0, 0, 0, 255]]
+
+
+def paletteImage(height, width, color_count, seed=0):
+    rng = np.random.default_rng(seed)
+    palette = rng.integers(0, 256, (color_count, 4), dtype=np.uint8)
+    return palette[rng.integers(0, color_count, (height, width))]
+
+
+@pytest.mark.parametrize("pixel_map", [
+    paletteImage(7, 11, 6),
+    paletteImage(1, 1, 1),
+    paletteImage(20, 30, 8)[::2, 1::3],
+    np.empty((0, 4, 4), dtype=np.uint8),
+    np.empty((3, 0, 4), dtype=np.uint8),
+], ids=["small", "1x1", "non-contiguous-view", "no-rows", "no-columns"])
+def test_color_layers_cover_every_pixel(pixel_map):
+    colors, layers = determineColorLayers(pixel_map)
+    assert len(colors) == len(layers)
+    assert sum(rows.size for rows, _ in layers) == pixel_map.shape[0] * pixel_map.shape[1]
+    for color, (rows, columns) in zip(colors, layers):
+        assert rows.dtype == columns.dtype == np.int32
+        assert (pixel_map[rows, columns] == color).all()
+    assert len({tuple(color) for color in colors.tolist()}) == len(colors)
+
+
+def batchImages(count):
+    return [pngFile(np.full((2, 3, 4), index, dtype=np.uint8)) for index in range(count)]
+
+
+def firstColors(handlers):
+    return [int(handler.colors[0][0]) for handler in handlers]
+
+
+def test_handle_batch_keeps_input_order():
+    assert firstColors(ImageHandler.handle_batch(batchImages(9), max_workers=2)) == list(range(9))
+
+
+def test_handle_batch_accepts_paths(tmp_path):
+    paths = []
+    for index, image in enumerate(batchImages(3)):
+        path = tmp_path / f"{index}.png"
+        path.write_bytes(image.getvalue())
+        paths.append(str(path) if index % 2 else path)
+    assert firstColors(ImageHandler.handle_batch(paths)) == [0, 1, 2]
+
+
+def test_handle_batch_bounds_the_decode_window():
+    consumed = []
+
+    def images():
+        for index, image in enumerate(batchImages(10)):
+            consumed.append(index)
+            yield image
+
+    batch = ImageHandler.handle_batch(images(), max_workers=3)
+    assert firstColors([next(batch)]) == [0]
+    assert len(consumed) == 4
+    batch.close()
+    assert len(consumed) == 4
+
+
+def test_handle_batch_yields_handlers_before_a_failed_decode():
+    images = batchImages(5)
+    images[3] = io.BytesIO(b"not a png")
+    handled = []
+    with pytest.raises(UnidentifiedImageError):
+        for handler in ImageHandler.handle_batch(images, max_workers=2):
+            handled.append(handler)
+    assert firstColors(handled) == [0, 1, 2]
+    assert all(image.closed for image in images)
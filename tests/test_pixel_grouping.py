@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from ImageTreatment import pixel_grouping
+from ImageTreatment.pixel_grouping import estimateUniqueCount, groupPackedPixels, sortPackedPixels
+
+requires_numba = pytest.mark.skipif(pixel_grouping.njit is None, reason="Numba is not installed")
+
+
+def randomPixels(size, color_count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, color_count, size).astype(np.uint32) * np.uint32(16777259)
+
+
+@requires_numba
+@pytest.mark.parametrize("packed", [
+    np.array([42], dtype=np.uint32),
+    np.full(1000, 7, dtype=np.uint32),
+    np.random.default_rng(1).permutation(5000).astype(np.uint32),
+    randomPixels(10000, 5),
+    randomPixels(10007, 50),
+], ids=["1x1", "single-color", "all-unique", "few-colors", "uneven-chunks"])
+def test_hash_matches_sort(packed):
+    expected = sortPackedPixels(packed)
+    result = pixel_grouping.hashPackedPixels(packed)
+    for expected_array, result_array in zip(expected, result):
+        assert result_array.dtype == expected_array.dtype
+        np.testing.assert_array_equal(result_array, expected_array)
+
+
+@pytest.mark.parametrize("group", [
+    sortPackedPixels,
+    groupPackedPixels,
+    pytest.param(lambda packed: pixel_grouping.hashPackedPixels(packed), marks=requires_numba, id="hash"),
+])
+def test_empty_input(group):
+    keys, order, boundaries = group(np.empty(0, dtype=np.uint32))
+    assert keys.size == order.size == boundaries.size == 0
+
+
+@pytest.mark.parametrize("packed", [
+    np.zeros(0, dtype=np.uint32),
+    randomPixels(100000, 5),
+    np.random.default_rng(2).permutation(100000).astype(np.uint32),
+], ids=["empty", "few-colors", "all-unique"])
+def test_estimate_unique_count(packed):
+    assert estimateUniqueCount(packed) == pytest.approx(np.unique(packed).size, rel=0.05)
+
+
+@pytest.mark.parametrize("packed, min_pixels, expected", [
+    (randomPixels(200000, 5), 0, "hash"),
+    (randomPixels(200000, 20000), 0, "hash"),
+    (np.random.default_rng(3).permutation(200000).astype(np.uint32), 0, "sort"),
+    (randomPixels(200000, 5), 200001, "sort"),
+], ids=["few-colors", "ten-percent-unique", "all-unique", "below-min-pixels"])
+def test_group_dispatch(monkeypatch, packed, min_pixels, expected):
+    monkeypatch.setattr(pixel_grouping, "njit", lambda function: function)
+    monkeypatch.setattr(pixel_grouping, "HASH_MIN_PIXELS", min_pixels)
+    monkeypatch.setattr(pixel_grouping, "sortPackedPixels", lambda packed: "sort")
+    monkeypatch.setattr(pixel_grouping, "hashPackedPixels", lambda packed: "hash", raising=False)
+    assert groupPackedPixels(packed) == expected
+
+
+def test_group_dispatch_without_numba(monkeypatch):
+    monkeypatch.setattr(pixel_grouping, "njit", None)
+    monkeypatch.setattr(pixel_grouping, "HASH_MIN_PIXELS", 0)
+    monkeypatch.setattr(pixel_grouping, "sortPackedPixels", lambda packed: "sort")
+    assert groupPackedPixels(randomPixels(200000, 5)) == "sort"